@@ -6,30 +6,49 @@ Copyright (c) 2023-present japandotorg
 
 import asyncio
 import logging
-import re
-from typing import Annotated, Any, Callable, Coroutine, Dict, Final, List, Optional, Union
+import time
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Final,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-import arrow
 import discord
+import regex
 from redbot.cogs.cleanup.cleanup import Cleanup as CleanupCog
 from redbot.core import app_commands, commands, modlog
 from redbot.core.bot import Red
-from redbot.core.utils import mod
-from redbot.core.utils.chat_formatting import humanize_list, humanize_number
+from redbot.core.utils.chat_formatting import humanize_list
 
 from .converters import PurgeFlags, RawMessageIdsConverter, Snowflake
 from .utils import (
+    _NO_PING,
+    _REASON_FMT,
     CUSTOM_EMOJI_RE,
     LINKS_RE,
     _cleanup,
     _create_case,
+    _custom_predicate_factory,
     get_message_from_reference,
     get_messages_for_deletion,
     has_hybrid_permissions,
+    mass_purge,
 )
 
 log: logging.Logger = logging.getLogger("red.seina.purge")
 
+REGEX_TIMEOUT: Final[float] = 0.05
+REGEX_BUDGET: Final[float] = 1.0
+REACTIONS_CONCURRENCY: Final[int] = 5
+
 
 class Purge(commands.Cog):
     __doc__ = CleanupCog.__doc__
@@ -117,11 +136,7 @@ class Purge(commands.Cog):
         - `[p] purge 2000`
         """
         if ctx.invoked_subcommand is None:
-
-            def check(message: discord.Message) -> bool:
-                return message.created_at > arrow.utcnow().shift(days=-14).datetime
-
-            await _cleanup(ctx, number, check, channel=channel)
+            await _cleanup(ctx, number, lambda m: True, channel=channel, bulk_only=True)
 
     @_purge.command(name="embeds", aliases=["embed"])  # type: ignore
     async def _embeds(
@@ -143,7 +158,7 @@ class Purge(commands.Cog):
         - `[p]purge embeds 10`
         - `[p]purge embeds 2000`
         """
-        await _cleanup(ctx, number, lambda e: len(e.embeds), channel=channel)
+        await _cleanup(ctx, number, lambda e: e.embeds, channel=channel)
 
     @_purge.command(name="regex")  # type: ignore
     async def _regex(
@@ -157,6 +172,7 @@ class Purge(commands.Cog):
     ):
         """
         Removes messages that matches the regex pattern.
+        Matching stops once the pattern takes too long, the remaining messages are skipped.
 
         **Arguments:**
         - `<pattern>`: The regex pattern to match.
@@ -167,15 +183,48 @@ class Purge(commands.Cog):
         - `[p]purge regex (?i)(h(?:appy) 1`
         - `[p]purge regex (?i)(h(?:appy) 10`
         """
+        try:
+            compiled: regex.Pattern = regex.compile(pattern)  # type: ignore
+        except regex.error as error:
+            await ctx.send(
+                f"Invalid regex pattern: **{error}**",
+                reference=ctx.message.to_reference(fail_if_not_exists=False),
+                allowed_mentions=_NO_PING,
+            )
+            return
+
+        # check() runs synchronously on the event loop, so the total time spent matching is
+        # capped as well, once the pattern times out or the budget is used up nothing else matches.
+        spent: float = 0.0
+        exhausted: bool = False
 
         def check(message: discord.Message) -> bool:
-            ret = (
-                bool(re.match(rf"{pattern}", message.content))
-                and message.created_at > arrow.utcnow().shift(days=-14).datetime
-            )
-            return ret
+            nonlocal spent, exhausted
+            if exhausted:
+                return False
+            remaining: float = REGEX_BUDGET - spent
+            start: float = time.perf_counter()
+            try:
+                return (
+                    compiled.match(message.content, timeout=min(REGEX_TIMEOUT, remaining))
+                    is not None
+                )
+            except TimeoutError:
+                exhausted = True
+                return False
+            finally:
+                spent += time.perf_counter() - start
+                if spent >= REGEX_BUDGET:
+                    exhausted = True
+
+        await _cleanup(ctx, number, check, channel=channel, bulk_only=True)
 
-        await _cleanup(ctx, number, check, channel=channel)
+        if exhausted:
+            await ctx.send(
+                "The pattern took too long to match, so the remaining messages were skipped.",
+                reference=ctx.message.to_reference(fail_if_not_exists=False),
+                allowed_mentions=_NO_PING,
+            )
 
     @_purge.command(name="files", aliases=["file"])  # type: ignore
     async def _files(
@@ -197,7 +246,7 @@ class Purge(commands.Cog):
         - `[p]purge files 10`
         - `[p]purge files 2000`
         """
-        await _cleanup(ctx, number, lambda e: len(e.attachments), channel=channel)
+        await _cleanup(ctx, number, lambda e: e.attachments, channel=channel)
 
     @_purge.command(name="images", aliases=["image"])  # type: ignore
     async def _images(
@@ -219,7 +268,7 @@ class Purge(commands.Cog):
         - `[p]purge images 10`
         - `[p]purge images 2000`
         """
-        await _cleanup(ctx, number, lambda e: len(e.embeds) or len(e.attachments), channel=channel)
+        await _cleanup(ctx, number, lambda e: e.embeds or e.attachments, channel=channel)
 
     @_purge.command(name="user", aliases=["member"])  # type: ignore
     async def _user(
@@ -271,7 +320,7 @@ class Purge(commands.Cog):
             await ctx.send(
                 "The text length must be at least 3 characters long.",
                 reference=ctx.message.to_reference(fail_if_not_exists=False),
-                allowed_mentions=discord.AllowedMentions(replied_user=False),
+                allowed_mentions=_NO_PING,
             )
         else:
             await _cleanup(ctx, 100, lambda e: text in e.content, channel=channel)
@@ -300,12 +349,11 @@ class Purge(commands.Cog):
         """
 
         def predicate(message: discord.Message) -> Union[Optional[bool], str]:
-            return (
-                (message.webhook_id is None and message.author.bot)
-                or (prefix and message.content.startswith(prefix))
-            ) and message.created_at > arrow.utcnow().shift(days=-14).datetime
+            return (message.webhook_id is None and message.author.bot) or (
+                prefix and message.content.startswith(prefix)
+            )
 
-        await _cleanup(ctx, number, predicate, channel=channel)
+        await _cleanup(ctx, number, predicate, channel=channel, bulk_only=True)
 
     @_purge.command(name="emoji", aliases=["emojis"])  # type: ignore
     async def _emoji(
@@ -327,14 +375,10 @@ class Purge(commands.Cog):
         - `[p]purge emoji 10`
         - `[p]purge emoji 200`
         """
-
-        def predicate(message: discord.Message) -> bool:
-            return bool(
-                CUSTOM_EMOJI_RE.search(message.content)
-                and message.created_at > arrow.utcnow().shift(days=-14).datetime
-            )
-
-        await _cleanup(ctx, number, predicate, channel=channel)
+        emoji_search: Callable[[str], Any] = CUSTOM_EMOJI_RE.search
+        await _cleanup(
+            ctx, number, lambda m: emoji_search(m.content), channel=channel, bulk_only=True
+        )
 
     # https://github.com/Rapptz/RoboDanny/blob/rewrite/cogs/mod.py#L1829
     @_purge.command(name="reactions", aliases=["reaction"])  # type: ignore
@@ -360,16 +404,41 @@ class Purge(commands.Cog):
         channel: Union[
             discord.Thread, discord.TextChannel, discord.VoiceChannel, discord.StageChannel
         ] = (channel if channel else ctx.channel)
-        total_reactions: int = 0
+        targets: List[Tuple[discord.Message, int]] = []
         async for message in channel.history(limit=number, before=ctx.message):
-            if len(message.reactions):
-                total_reactions += sum(r.count for r in message.reactions)
+            if message.reactions:
+                targets.append((message, sum(r.count for r in message.reactions)))
+
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(REACTIONS_CONCURRENCY)
+
+        async def clear(message: discord.Message) -> None:
+            async with semaphore:
                 await message.clear_reactions()
 
+        results: List[Optional[BaseException]] = await asyncio.gather(
+            *(clear(m) for m, _ in targets), return_exceptions=True
+        )
+        total_reactions: int = 0
+        errors: List[BaseException] = []
+        for (_, count), result in zip(targets, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                total_reactions += count
+
+        if errors and len(errors) == len(targets):
+            raise errors[0]
+
+        failed: str = (
+            f" Failed to clear reactions on {len(errors)} "
+            f"{'message' if len(errors) == 1 else 'messages'}."
+            if errors
+            else ""
+        )
         await ctx.send(
-            f"Successfully removed {total_reactions} reactions.",
+            f"Successfully removed {total_reactions} reactions.{failed}",
             reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            allowed_mentions=_NO_PING,
         )
 
     @_purge.command(name="self")  # type: ignore
@@ -436,7 +505,8 @@ class Purge(commands.Cog):
         - `[p]purge links 10`
         - `[p]purge links 2000`
         """
-        await _cleanup(ctx, number, lambda m: LINKS_RE.search(m.content), channel=channel)
+        links_search: Callable[[str], Any] = LINKS_RE.search
+        await _cleanup(ctx, number, lambda m: links_search(m.content), channel=channel)
 
     @_purge.command(name="after")  # type: ignore
     async def _after(
@@ -457,6 +527,7 @@ class Purge(commands.Cog):
         - `<message_id>` The id of the message to cleanup after. This message won't be deleted.
         - `<delete_pinned>` Whether to delete pinned messages or not. Defaults to False
         """
+        ref: discord.MessageReference = ctx.message.to_reference(fail_if_not_exists=False)
         after: Optional[discord.Message] = None
 
         if message_id:
@@ -465,8 +536,8 @@ class Purge(commands.Cog):
             except discord.NotFound:
                 await ctx.send(
                     "Message not found.",
-                    reference=ctx.message.to_reference(fail_if_not_exists=False),
-                    allowed_mentions=discord.AllowedMentions(replied_user=False),
+                    reference=ref,
+                    allowed_mentions=_NO_PING,
                 )
                 return
         elif reference := ctx.message.reference:
@@ -477,8 +548,8 @@ class Purge(commands.Cog):
         if after is None:
             await ctx.send(
                 f"Could not find any messages to delete.",
-                reference=ctx.message.to_reference(fail_if_not_exists=False),
-                allowed_mentions=discord.AllowedMentions(replied_user=False),
+                reference=ref,
+                allowed_mentions=_NO_PING,
             )
             return
 
@@ -486,10 +557,10 @@ class Purge(commands.Cog):
             channel=ctx.channel, number=None, after=after, delete_pinned=delete_pinned
         )
 
-        reason: str = "{} ({}) deleted {} messages in channel #{}.".format(
+        reason: str = _REASON_FMT.format(
             ctx.author,
             ctx.author.id,
-            humanize_number(len(to_delete), override_locale="en_US"),
+            f"{len(to_delete):,}",
             ctx.channel.name,
         )
 
@@ -501,11 +572,11 @@ class Purge(commands.Cog):
             user=ctx.guild.me,
             moderator=ctx.author,
         )
-        await mod.mass_purge(to_delete, ctx.channel, reason=reason)
+        await mass_purge(to_delete, ctx.channel, reason=reason)
         await ctx.send(
             f"Successfully deleted {len(to_delete)} {'message' if len(to_delete) == 1 else 'messages'}.",
-            reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            reference=ref,
+            allowed_mentions=_NO_PING,
         )
 
     @_purge.command(name="before")  # type: ignore
@@ -529,6 +600,7 @@ class Purge(commands.Cog):
         - `<number>` The max number of messages to cleanup. Must be a positive integer.
         - `<delete_pinned>` Whether to delete pinned messages or not. Defaults to False
         """
+        ref: discord.MessageReference = ctx.message.to_reference(fail_if_not_exists=False)
         before: Optional[discord.Message] = None
 
         if message_id:
@@ -537,8 +609,8 @@ class Purge(commands.Cog):
             except discord.NotFound:
                 await ctx.send(
                     "Message not found.",
-                    reference=ctx.message.to_reference(fail_if_not_exists=False),
-                    allowed_mentions=discord.AllowedMentions(replied_user=False),
+                    reference=ref,
+                    allowed_mentions=_NO_PING,
                 )
                 return
         elif reference := ctx.message.reference:
@@ -549,8 +621,8 @@ class Purge(commands.Cog):
         if before is None:
             await ctx.send(
                 f"Could not find any messages to delete.",
-                reference=ctx.message.to_reference(fail_if_not_exists=False),
-                allowed_mentions=discord.AllowedMentions(replied_user=False),
+                reference=ref,
+                allowed_mentions=_NO_PING,
             )
             return
 
@@ -559,10 +631,10 @@ class Purge(commands.Cog):
         )
         to_delete.append(ctx.message)
 
-        reason: str = "{} ({}) deleted {} messages in channel #{}.".format(
+        reason: str = _REASON_FMT.format(
             ctx.author,
             ctx.author.id,
-            humanize_number(len(to_delete), override_locale="en_US"),
+            f"{len(to_delete):,}",
             ctx.channel.name,
         )
 
@@ -574,11 +646,11 @@ class Purge(commands.Cog):
             user=ctx.guild.me,
             moderator=ctx.author,
         )
-        await mod.mass_purge(to_delete, ctx.channel, reason=reason)
+        await mass_purge(to_delete, ctx.channel, reason=reason)
         await ctx.send(
             f"Successfully deleted {len(to_delete)} {'message' if len(to_delete) == 1 else 'messages'}.",
-            reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            reference=ref,
+            allowed_mentions=_NO_PING,
         )
 
     @_purge.command(name="between")  # type: ignore
@@ -602,32 +674,30 @@ class Purge(commands.Cog):
         **Example:**
         - `[p]cleanup between 123456789123456789 987654321987654321`
         """
-        try:
-            message_one: Optional[discord.Message] = await ctx.channel.fetch_message(one)  # type: ignore
-        except discord.NotFound:
-            await ctx.send(
-                f"Could not find a message with the ID of {one}.",
-                reference=ctx.message.to_reference(fail_if_not_exists=False),
-                allowed_mentions=discord.AllowedMentions(replied_user=False),
-            )
-            return
-        try:
-            message_two: Optional[discord.Message] = await ctx.channel.fetch_message(two)  # type: ignore
-        except discord.NotFound:
-            await ctx.send(
-                f"Could not find a message with the ID of {two}.",
-                reference=ctx.message.to_reference(fail_if_not_exists=False),
-                allowed_mentions=discord.AllowedMentions(replied_user=False),
-            )
-            return
+        ref: discord.MessageReference = ctx.message.to_reference(fail_if_not_exists=False)
+        message_one, message_two = await asyncio.gather(
+            ctx.channel.fetch_message(one),  # type: ignore
+            ctx.channel.fetch_message(two),  # type: ignore
+            return_exceptions=True,
+        )
+        for message_id, result in ((one, message_one), (two, message_two)):
+            if isinstance(result, discord.NotFound):
+                await ctx.send(
+                    f"Could not find a message with the ID of {message_id}.",
+                    reference=ref,
+                    allowed_mentions=_NO_PING,
+                )
+                return
+            if isinstance(result, BaseException):
+                raise result
         to_delete: List[discord.Message] = await get_messages_for_deletion(
             channel=ctx.channel, before=message_two, after=message_one, delete_pinned=delete_pinned
         )
         to_delete.append(ctx.message)
-        reason: str = "{} ({}) deleted {} messages in channel #{}.".format(
+        reason: str = _REASON_FMT.format(
             ctx.author,
             ctx.author.id,
-            humanize_number(len(to_delete), override_locale="en_US"),
+            f"{len(to_delete):,}",
             ctx.channel.name,
         )
 
@@ -639,11 +709,11 @@ class Purge(commands.Cog):
             user=ctx.guild.me,
             moderator=ctx.author,
         )
-        await mod.mass_purge(to_delete, ctx.channel, reason=reason)
+        await mass_purge(to_delete, ctx.channel, reason=reason)
         await ctx.send(
             f"Successfully deleted {len(to_delete)} {'message' if len(to_delete) == 1 else 'messages'}.",
-            reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            reference=ref,
+            allowed_mentions=_NO_PING,
         )
 
     @_purge.command(name="duplicates", aliases=["duplicate", "spam"])  # type: ignore
@@ -654,23 +724,36 @@ class Purge(commands.Cog):
         **Arguments:**
         - `<number>` The number of messages to check for duplicates. Must be a positive integer.
         """
-        messages: List[discord.Message] = []
+        # Messages are first bucketed by author and content, the full key (with embeds and
+        # stickers) is only built once a second message lands in the same bucket.
+        quick_seen: Dict[Tuple[int, str], Optional[discord.Message]] = {}
+        seen: Set[Tuple[int, str, Tuple[str, ...], Tuple[int, ...]]] = set()
         spam: List[discord.Message] = []
 
+        def full_key(m: discord.Message) -> Tuple[int, str, Tuple[str, ...], Tuple[int, ...]]:
+            return (
+                m.author.id,
+                m.content,
+                tuple(repr(embed.to_dict()) for embed in m.embeds),
+                tuple(sticker.id for sticker in m.stickers),
+            )
+
         def check(m: discord.Message):
             if m.attachments:
                 return False
-            content = (
-                m.author.id,
-                m.content,
-                [embed.to_dict() for embed in m.embeds],
-                [sticker.id for sticker in m.stickers],
-            )  # type: ignore
-            if content in messages:
+            quick_key = (m.author.id, m.content)
+            if quick_key not in quick_seen:
+                quick_seen[quick_key] = m
+                return False
+            if (first := quick_seen[quick_key]) is not None:
+                seen.add(full_key(first))
+                quick_seen[quick_key] = None
+            key = full_key(m)
+            if key in seen:
                 spam.append(m)
                 return True
             else:
-                messages.append(content)  # type: ignore
+                seen.add(key)
                 return False
 
         to_delete: List[discord.Message] = await get_messages_for_deletion(
@@ -686,11 +769,11 @@ class Purge(commands.Cog):
             user=ctx.guild.me,
             moderator=ctx.author,
         )
-        await mod.mass_purge(to_delete, ctx.channel, reason="Duplicate message purge.")
+        await mass_purge(to_delete, ctx.channel, reason="Duplicate message purge.")
         await ctx.send(
             f"Successfully deleted {len(to_delete)} {'message' if len(to_delete) == 1 else 'messages'}.",
             reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            allowed_mentions=_NO_PING,
         )
 
     # https://github.com/Rapptz/RoboDanny/blob/rewrite/cogs/mod.py#L1704
@@ -721,47 +804,40 @@ class Purge(commands.Cog):
         `reactions: yes` Remove messages that have reactions.
         `require: any or all` Whether any or all flags should be met before deleting messages.
         """
-        predicates: List[Callable[[discord.Message], Any]] = []
+        checks: List[str] = []
 
         if flags.bot:
-            if flags.webhooks:
-                predicates.append(lambda m: m.author.bot)
-            else:
-                predicates.append(
-                    lambda m: (m.webhook_id is None or m.interaction is not None) and m.author.bot
-                )
+            checks.append("bot_webhooks" if flags.webhooks else "bot")
         elif flags.webhooks:
-            predicates.append(lambda m: m.webhook_id is not None)
+            checks.append("webhooks")
 
         if flags.embeds:
-            predicates.append(lambda m: len(m.embeds))
+            checks.append("embeds")
 
         if flags.files:
-            predicates.append(lambda m: len(m.attachments))
+            checks.append("files")
 
         if flags.reactions:
-            predicates.append(lambda m: len(m.reactions))
+            checks.append("reactions")
 
         if flags.emoji:
-            predicates.append(lambda m: CUSTOM_EMOJI_RE.search(m.content))
+            checks.append("emoji")
 
         if flags.user:
-            predicates.append(lambda m: m.author == flags.user)
+            checks.append("user")
 
         if flags.contains:
-            predicates.append(lambda m: flags.contains in m.content)  # type: ignore
+            checks.append("contains")
 
         if flags.prefix:
-            predicates.append(lambda m: m.content.startswith(flags.prefix))  # type: ignore
+            checks.append("prefix")
 
         if flags.suffix:
-            predicates.append(lambda m: m.content.endswith(flags.suffix))  # type: ignore
-
-        op = all if flags.require == "all" else any
+            checks.append("suffix")
 
-        def predicate(m: discord.Message) -> bool:
-            r = op(p(m) for p in predicates)
-            return r
+        predicate: Callable[[discord.Message], Any] = _custom_predicate_factory(
+            tuple(checks), flags.require
+        )(flags.user, flags.contains, flags.prefix, flags.suffix, CUSTOM_EMOJI_RE.search)
 
         if flags.after:
             if number is None:
@@ -5,6 +5,7 @@ Copyright (c) 2023-present japandotorg
 """
 
 import datetime
+import functools
 import re
 from collections import Counter
 from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple, TypeVar, Union
@@ -12,7 +13,6 @@ from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple, TypeVar,
 import discord
 from redbot.core import commands, modlog
 from redbot.core.bot import Red
-from redbot.core.utils.chat_formatting import humanize_number
 
 T = TypeVar("T")
 
@@ -20,11 +20,15 @@ __all__: Tuple[str, ...] = (
     "_cleanup",
     "_create_case",
     "_check_permissions",
+    "_custom_predicate_factory",
     "has_hybrid_permissions",
     "get_message_from_reference",
     "get_messages_for_deletion",
+    "mass_purge",
     "CUSTOM_EMOJI_RE",
     "LINKS_RE",
+    "_NO_PING",
+    "_REASON_FMT",
 )
 
 CUSTOM_EMOJI_RE: Pattern[str] = re.compile(r"<a?:[a-zA-Z0-9\_]+:([0-9]+)>")
@@ -32,6 +36,23 @@ LINKS_RE = re.compile(
     r"((http|https)\:\/\/)?[a-zA-Z0-9\.\/\?\:@\-_=#]+\.([a-zA-Z]){2,6}([a-zA-Z0-9\.\&\/\?\:@\-_=#])*",
     flags=re.IGNORECASE,
 )
+_NO_PING: discord.AllowedMentions = discord.AllowedMentions(replied_user=False)
+_REASON_FMT: str = "{} ({}) deleted {} messages in channel #{}."
+
+# Expressions inlined into the generated `purge custom` predicate, keyed by check name.
+CUSTOM_PREDICATE_CHECKS: Dict[str, str] = {
+    "bot": "(m.webhook_id is None or m.interaction is not None) and m.author.bot",
+    "bot_webhooks": "m.author.bot",
+    "webhooks": "m.webhook_id is not None",
+    "embeds": "m.embeds",
+    "files": "m.attachments",
+    "reactions": "m.reactions",
+    "emoji": "emoji_search(m.content)",
+    "user": "m.author == user",
+    "contains": "contains in m.content",
+    "prefix": "m.content.startswith(prefix)",
+    "suffix": "m.content.endswith(suffix)",
+}
 
 
 async def _create_case(
@@ -60,6 +81,27 @@ async def _create_case(
     return case
 
 
+@functools.lru_cache(maxsize=128)
+def _custom_predicate_factory(
+    checks: Tuple[str, ...], require: str
+) -> Callable[..., Callable[[discord.Message], Any]]:
+    # Only the fixed expressions from CUSTOM_PREDICATE_CHECKS end up in the generated source,
+    # the flag values are passed to the factory as arguments and are never interpolated.
+    joiner: str = " and " if require == "all" else " or "
+    body: str = joiner.join(f"({CUSTOM_PREDICATE_CHECKS[check]})" for check in checks) or str(
+        require == "all"
+    )
+    source: str = (
+        "def factory(user, contains, prefix, suffix, emoji_search):\n"
+        "    def predicate(m):\n"
+        f"        return {body}\n"
+        "    return predicate\n"
+    )
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<purge custom predicate>", "exec"), namespace)
+    return namespace["factory"]
+
+
 async def _cleanup(
     ctx: commands.GuildContext,
     limit: Optional[int],
@@ -70,7 +112,10 @@ async def _cleanup(
     channel: Optional[  # type: ignore
         Union[discord.Thread, discord.TextChannel, discord.VoiceChannel, discord.StageChannel]
     ] = None,
+    bulk_only: bool = False,
 ):
+    ref: discord.MessageReference = ctx.message.to_reference(fail_if_not_exists=False)
+
     channel: Union[
         discord.Thread, discord.TextChannel, discord.VoiceChannel, discord.StageChannel
     ] = (channel if channel else ctx.channel)
@@ -83,16 +128,26 @@ async def _cleanup(
     two_weeks_before: datetime.datetime = ctx.message.created_at - datetime.timedelta(weeks=2)
     two_weeks_before_snowflake: int = discord.utils.time_snowflake(two_weeks_before)
 
+    # Messages older than two weeks can't be bulk deleted, commands passing `bulk_only`
+    # skip them here instead of checking the age in their own predicate.
+    if bulk_only:
+
+        def check(message: discord.Message) -> Any:
+            return message.id > two_weeks_before_snowflake and predicate(message)
+
+    else:
+        check: Callable[[discord.Message], Any] = predicate
+
     if after:
         _after: int = max(two_weeks_before_snowflake, after)
         passed_after: Optional[discord.Object] = discord.Object(id=_after)
     else:
         passed_after: Optional[discord.Object] = None
 
-    reason: str = "{} ({}) deleted {} messages in channel #{}.".format(
+    reason: str = _REASON_FMT.format(
         ctx.author,
         ctx.author.id,
-        humanize_number(limit, override_locale="en_US"),
+        f"{limit:,}",
         ctx.channel.name,
     )
 
@@ -101,14 +156,14 @@ async def _cleanup(
             limit=limit,
             before=passed_before,
             after=passed_after,
-            check=predicate,
+            check=check,
             reason=reason,
         )
     except discord.HTTPException as e:
         await ctx.send(
             f"Unable to {ctx.command.qualified_name}. Error: **{e}** (try a smaller search?)",
-            reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            reference=ref,
+            allowed_mentions=_NO_PING,
         )
         return
     else:
@@ -141,15 +196,15 @@ async def _cleanup(
     if len(to_send) > 2000:
         await ctx.send(
             f"Successfully removed {deleted} messages.",
-            reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            reference=ref,
+            allowed_mentions=_NO_PING,
             delete_after=10,
         )
     else:
         await ctx.send(
             to_send,
-            reference=ctx.message.to_reference(fail_if_not_exists=False),
-            allowed_mentions=discord.AllowedMentions(replied_user=False),
+            reference=ref,
+            allowed_mentions=_NO_PING,
             delete_after=10,
         )
 
@@ -201,10 +256,13 @@ async def get_messages_for_deletion(
     date: datetime.datetime = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
         days=14, minutes=-5
     )
+    date_snowflake: int = discord.utils.time_snowflake(date)
 
     def predicate(message: discord.Message) -> bool:
         return (
-            check(message) and message.created_at > date and (delete_pinned or not message.pinned)
+            message.id > date_snowflake
+            and check(message)
+            and (delete_pinned or not message.pinned)
         )
 
     if after:
@@ -217,7 +275,7 @@ async def get_messages_for_deletion(
     async for message in channel.history(
         limit=limit, before=before, after=after, oldest_first=False
     ):
-        if message.created_at < date:
+        if message.id < date_snowflake:
             break
         if predicate(message):
             collected.append(message)
@@ -227,6 +285,25 @@ async def get_messages_for_deletion(
     return collected
 
 
+async def mass_purge(
+    messages: List[discord.Message],
+    channel: Union[
+        discord.TextChannel,
+        discord.VoiceChannel,
+        discord.StageChannel,
+        discord.Thread,
+    ],
+    *,
+    reason: Optional[str] = None,
+) -> None:
+    for i in range(0, len(messages), 100):
+        # discord.NotFound can be raised when a single message batch no longer exists.
+        try:
+            await channel.delete_messages(messages[i : i + 100], reason=reason)
+        except discord.HTTPException:
+            pass
+
+
 async def _check_permissions(ctx: commands.GuildContext, perms: Dict[str, bool]):
     is_owner: bool = await ctx.bot.is_owner(ctx.author)
     if is_owner: